@@ -5,20 +5,24 @@
 通知紀錄存在 alert_log.json（會 commit 回 GitHub）
 """
 
-import yfinance as yf
-import requests
+# yfinance / requests 載入要 1~2 秒，改在用到的函式內才 import，
+# 非交易時間啟動可直接結束
 import re
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, time as dtime, timezone, timedelta
 
 SCAN_RESULT_FILE = 'scan_result.txt'
 ALERT_LOG_FILE   = 'alert_log.json'
 NOTIFY_URL       = 'https://case.acsite.org/arduino2/insert.php?num='
 COOLDOWN_HOURS   = 24   # 同一檔股票最少間隔幾小時才再通知
+MAX_WORKERS      = 16   # 逐檔補抓報價的執行緒數
 
 TZ_TW = timezone(timedelta(hours=8))
 
+_SESSION = None
+
 
 # ────────────────────────────────────────────
 # 交易時間判斷
@@ -41,21 +45,34 @@ def is_trading_time():
 # ────────────────────────────────────────────
 
 def load_alert_log():
+    """讀入後直接轉成 datetime，之後判斷冷卻時間不必再逐次解析字串"""
     if not os.path.exists(ALERT_LOG_FILE):
         return {}
     try:
         with open(ALERT_LOG_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            raw = json.load(f)
     except:
         return {}
 
+    log = {}
+    for code, last_str in raw.items():
+        try:
+            last_time = datetime.fromisoformat(last_str)
+        except (TypeError, ValueError):
+            continue  # 格式錯誤視同未通知過
+        if last_time.tzinfo is None:
+            last_time = last_time.replace(tzinfo=TZ_TW)
+        log[code] = last_time
+    return log
+
 
 def save_alert_log(log):
+    data = {code: last_time.isoformat() for code, last_time in log.items()}
     with open(ALERT_LOG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(log, f, ensure_ascii=False, indent=2)
+        json.dump(data, f, ensure_ascii=False, indent=2)
 
 
-def should_notify(code, log):
+def should_notify(code, log, now=None):
     """
     判斷這檔股票現在是否該發通知：
     - 從未通知過 → 發
@@ -64,20 +81,18 @@ def should_notify(code, log):
     """
     if code not in log:
         return True
-    last_str = log[code]
-    try:
-        last_time = datetime.fromisoformat(last_str)
-        now = datetime.now(TZ_TW)
-        diff_hours = (now - last_time).total_seconds() / 3600
-        return diff_hours >= COOLDOWN_HOURS
-    except:
-        return True
+    now = now or datetime.now(TZ_TW)
+    return now - log[code] >= timedelta(hours=COOLDOWN_HOURS)
 
 
 # ────────────────────────────────────────────
 # 解析 scan_result.txt
 # ────────────────────────────────────────────
 
+_SPLIT_RE = re.compile(r'\s{2,}')
+# 分隔線或標題／說明文字的行一律略過
+_SKIP_RE = re.compile(r'^[=\-]|代號|執行時間|篩選條件|共找到|台股月MACD|結果已寫入|完成')
+
 def parse_scan_result(filepath):
     stocks = []
     try:
@@ -87,13 +102,10 @@ def parse_scan_result(filepath):
         for line in lines:
             if not line.strip():
                 continue
-            if line.startswith('=') or line.startswith('-'):
-                continue
-            if any(k in line for k in ['代號', '執行時間', '篩選條件', '共找到',
-                                        '台股月MACD', '結果已寫入', '完成']):
+            if _SKIP_RE.search(line):
                 continue
 
-            parts = re.split(r'\s{2,}', line.strip())
+            parts = _SPLIT_RE.split(line.strip())
             if len(parts) < 5:
                 continue
 
@@ -122,11 +134,15 @@ def parse_scan_result(filepath):
 # 抓延遲報價
 # ────────────────────────────────────────────
 
+def to_symbol(code, market):
+    return f"{code}{'.TW' if market == '上市' else '.TWO'}"
+
+
 def get_current_price(code, market):
+    """單檔報價：抓近 5 天日K取最後收盤（fast_info 內部會下載一整年日K，反而更重）"""
+    import yfinance as yf
     try:
-        suffix = '.TW' if market == '上市' else '.TWO'
-        ticker = yf.Ticker(f"{code}{suffix}")
-        hist = ticker.history(period='1d', interval='1m')
+        hist = yf.Ticker(to_symbol(code, market)).history(period='5d', interval='1d')
         if hist.empty:
             return None
         return round(hist['Close'].iloc[-1], 2)
@@ -134,10 +150,54 @@ def get_current_price(code, market):
         return None
 
 
+def get_current_prices(stocks):
+    """
+    一次批次下載所有監控股票的當日 K 棒，回傳 {代號: 最新價 或 None}
+    批次中抓不到的才改用 get_current_price 逐檔補抓
+    """
+    import yfinance as yf
+    symbols = {s['代號']: to_symbol(s['代號'], s['市場']) for s in stocks}
+    try:
+        df = yf.download(list(symbols.values()), period='1d', interval='1d',
+                         group_by='ticker', threads=True, progress=False)
+    except:
+        df = None
+
+    prices, missing = {}, []
+    for code, symbol in symbols.items():
+        try:
+            close = df[symbol]['Close'].dropna()
+            prices[code] = round(float(close.iloc[-1]), 2)
+        except:
+            missing.append(code)
+
+    markets = {s['代號']: s['市場'] for s in stocks}
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        fallback = executor.map(lambda c: get_current_price(c, markets[c]), missing)
+        prices.update(zip(missing, fallback))
+    return prices
+
+
 # ────────────────────────────────────────────
 # 觸價通知
 # ────────────────────────────────────────────
 
+def get_session():
+    """
+    共用連線池，多次通知可重用同一條 TLS 連線（第一次呼叫時才建立）
+    insert.php 每次呼叫都會新增一筆，只重試連線失敗，讀取逾時不重送以免重複通知
+    """
+    global _SESSION
+    if _SESSION is None:
+        import requests
+        from urllib3.util.retry import Retry
+        _SESSION = requests.Session()
+        _SESSION.mount('https://', requests.adapters.HTTPAdapter(
+            pool_connections=32, pool_maxsize=32,
+            max_retries=Retry(total=2, connect=2, read=0)))
+    return _SESSION
+
+
 def notify(code, name, current_price, monthly_low):
     url = f"{NOTIFY_URL}{code}"
     headers = {
@@ -145,7 +205,7 @@ def notify(code, name, current_price, monthly_low):
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
     }
     try:
-        resp = requests.get(url, headers=headers, timeout=10)
+        resp = get_session().get(url, headers=headers, timeout=10)
         print(f"  🔔 觸價通知 {code} {name}  即時:{current_price} < 月低:{monthly_low}")
         print(f"     網址：{url}")
         print(f"     回應：HTTP {resp.status_code}  {resp.text[:100]}")
@@ -180,22 +240,24 @@ def main():
     log_updated = False
     triggered = 0
 
+    prices = get_current_prices(stocks)
+
     for s in stocks:
-        price = get_current_price(s['代號'], s['市場'])
+        price = prices.get(s['代號'])
         if price is None:
             print(f"  ⚠️  {s['代號']} {s['名稱']} 無法取得報價")
             continue
 
         if price < s['當月最低價']:
-            if should_notify(s['代號'], log):
+            if should_notify(s['代號'], log, now_tw):
                 success = notify(s['代號'], s['名稱'], price, s['當月最低價'])
                 if success:
                     # 記錄本次通知時間
-                    log[s['代號']] = now_tw.isoformat()
+                    log[s['代號']] = now_tw
                     log_updated = True
                     triggered += 1
             else:
-                last = log.get(s['代號'], '')
+                last = log[s['代號']].isoformat()
                 print(f"  ⏳ 冷卻中 {s['代號']} {s['名稱']}  即時:{price} < 月低:{s['當月最低價']}  (上次通知:{last[:16]})")
         else:
             print(f"  ✅ {s['代號']} {s['名稱']}  即時:{price}  月低:{s['當月最低價']}")
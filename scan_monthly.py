@@ -4,23 +4,64 @@
 每月5號自動執行，結果寫入 scan_result.txt
 """
 
+import os
+import re
+import glob
+import json
+import random
+import asyncio
+import functools
+import httpx
 import pandas as pd
-import yfinance as yf
 from datetime import datetime
 import warnings
 import requests
-from io import StringIO
+import lxml.html
+from concurrent.futures import ThreadPoolExecutor
 
 warnings.filterwarnings('ignore')
 
 MIN_DIVIDEND_YIELD = 3.0  # 最低殖利率 %
 OUTPUT_FILE = 'scan_result.txt'
+MAX_CONNECTIONS = 50      # 同時進行的 HTTP 請求數
+MAX_RETRIES = 4           # 被限流或伺服器錯誤時的重試次數
+RETRY_STATUS = {429, 500, 502, 503, 504}
+PROGRESS_EVERY = 10       # 每幾檔更新一次進度
+IN_GITHUB_ACTIONS = os.getenv('GITHUB_ACTIONS') == 'true'
+CHART_URL = 'https://query1.finance.yahoo.com/v8/finance/chart/{}'
+CACHE_FILE = f"monthly_cache_{datetime.now():%Y%m}.parquet"  # 已完成月份的月K快取
+LATEST_RANGE = '3mo'      # 有快取時只抓最近幾個月（含當月）
+DIVIDEND_CACHE_FILE = 'dividend_cache.json'                    # 股利資訊快取
+
+_dividend_cache = {}
+
+# 共用連線池，抓清單時重用 TLS 連線
+_SESSION = requests.Session()
+_SESSION.mount('https://', requests.adapters.HTTPAdapter(
+    pool_connections=32, pool_maxsize=32, max_retries=2))
 
 
 # ────────────────────────────────────────────
 # 股票清單
 # ────────────────────────────────────────────
 
+_STOCK_CODE_RE = re.compile(r'^\d{4}$')
+
+
+def parse_isin_table(content):
+    """從 ISIN 清單頁取出「代號　名稱」欄位，回傳 {代號: 名稱}（只留 4 碼代號）"""
+    tree = lxml.html.fromstring(content.decode('big5', errors='ignore'))
+    stocks = {}
+    for cell in tree.xpath('//tr/td[1]'):
+        text = cell.text_content().strip()
+        if '　' not in text:
+            continue
+        code, name = text.split('　', 1)
+        if _STOCK_CODE_RE.match(code):
+            stocks[code] = name.strip()
+    return stocks
+
+
 def fetch_twse_stocks():
     """抓取上市股票清單"""
     import urllib3
@@ -28,15 +69,9 @@ def fetch_twse_stocks():
     try:
         url = 'https://isin.twse.com.tw/isin/C_public.jsp?strMode=2'
         headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, verify=False, timeout=30)
-        response.encoding = 'big5'
-        tables = pd.read_html(StringIO(response.text))
-        df = tables[0]
-        df = df[df[0].str.contains('　', na=False)]
-        df[['stock_code', 'stock_name']] = df[0].str.split('　', n=1, expand=True)
-        df = df[df['stock_code'].str.match(r'^\d{4}$', na=False)]
-        df['stock_name'] = df['stock_name'].str.strip()
-        return {f"{r['stock_code']}.TW": r['stock_name'] for _, r in df.iterrows()}
+        response = _SESSION.get(url, headers=headers, verify=False, timeout=30)
+        stocks = parse_isin_table(response.content)
+        return {f"{code}.TW": name for code, name in stocks.items()}
     except Exception as e:
         print(f"⚠️  抓取上市股票失敗: {e}")
         return {}
@@ -49,15 +84,9 @@ def fetch_tpex_stocks():
     try:
         url = 'https://isin.twse.com.tw/isin/C_public.jsp?strMode=4'
         headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, verify=False, timeout=30)
-        response.encoding = 'big5'
-        tables = pd.read_html(StringIO(response.text))
-        df = tables[0]
-        df = df[df[0].str.contains('　', na=False)]
-        df[['stock_code', 'stock_name']] = df[0].str.split('　', n=1, expand=True)
-        df = df[df['stock_code'].str.match(r'^\d{4}$', na=False)]
-        df['stock_name'] = df['stock_name'].str.strip()
-        return {f"{r['stock_code']}.TWO": r['stock_name'] for _, r in df.iterrows()}
+        response = _SESSION.get(url, headers=headers, verify=False, timeout=30)
+        stocks = parse_isin_table(response.content)
+        return {f"{code}.TWO": name for code, name in stocks.items()}
     except Exception as e:
         print(f"⚠️  抓取上櫃股票失敗: {e}")
         return {}
@@ -65,8 +94,11 @@ def fetch_tpex_stocks():
 
 def get_all_stocks():
     print("🔄 抓取股票清單...")
-    twse = fetch_twse_stocks()
-    tpex = fetch_tpex_stocks()
+    # 上市、上櫃清單互不相依，同時抓
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        twse_future = executor.submit(fetch_twse_stocks)
+        tpex_future = executor.submit(fetch_tpex_stocks)
+        twse, tpex = twse_future.result(), tpex_future.result()
     all_stocks = {**twse, **tpex}
     print(f"✅ 上市 {len(twse)} 檔 + 上櫃 {len(tpex)} 檔 = 共 {len(all_stocks)} 檔")
     return all_stocks
@@ -76,64 +108,295 @@ def get_all_stocks():
 # 技術指標計算
 # ────────────────────────────────────────────
 
-def fetch_monthly_data(stock_code):
+def parse_chart(payload):
+    """
+    把 Yahoo chart API 的 JSON 轉成 OHLC DataFrame（比照 yfinance 做還原權值）
+    Dividends 欄位為除息日所在月份那根 K 棒的配息金額，DividendDate 為實際除息日
+    （同月多次配息時金額相加、日期取最後一次），近一年股利以除息日判斷
+    時間一律轉成交易所當地時間並去掉時區，快取讀回的資料才能直接合併
+    """
+    result = (payload.get('chart', {}).get('result') or [None])[0]
+    if not result or not result.get('timestamp'):
+        return None
+    quote = result['indicators']['quote'][0]
+    tz = result.get('meta', {}).get('exchangeTimezoneName', 'Asia/Taipei')
+    index = pd.to_datetime(result['timestamp'], unit='s', utc=True).tz_convert(tz).tz_localize(None)
+    data = pd.DataFrame({
+        'Open': quote.get('open'),
+        'High': quote.get('high'),
+        'Low': quote.get('low'),
+        'Close': quote.get('close'),
+        'Volume': quote.get('volume'),
+    }, index=index, dtype='float64').dropna(subset=['Close'])
+
+    adjclose = result['indicators'].get('adjclose')
+    if adjclose:
+        adj = pd.Series(adjclose[0]['adjclose'], index=index, dtype='float64').reindex(data.index)
+        ratio = (adj / data['Close']).fillna(1.0)
+        for col in ('Open', 'High', 'Low', 'Close'):
+            data[col] = data[col] * ratio
+
+    data['Dividends'] = 0.0
+    data['DividendDate'] = pd.Series(pd.NaT, index=data.index, dtype='datetime64[ns]')
+    events = (result.get('events') or {}).get('dividends') or {}
+    for event in sorted(events.values(), key=lambda e: e['date']):
+        ex_date = pd.Timestamp(event['date'], unit='s', tz='UTC').tz_convert(tz).tz_localize(None)
+        pos = data.index.searchsorted(ex_date, side='right') - 1
+        if pos >= 0:
+            data.iloc[pos, data.columns.get_loc('Dividends')] += event['amount']
+            data.iloc[pos, data.columns.get_loc('DividendDate')] = ex_date
+
+    # 月K 有時會把今天的資料另外多給一列，比照 yfinance 併回當月那根 K 棒
+    data = data.groupby(data.index.to_period('M')).agg({
+        'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last',
+        'Volume': 'sum', 'Dividends': 'sum', 'DividendDate': 'max',
+    })
+    data.index = data.index.to_timestamp()
+    return data
+
+
+def print_progress(done, total, label):
+    """
+    終端機：每 PROGRESS_EVERY 檔以 \\r 原地更新一次
+    GitHub Actions：網頁 log 不支援 \\r，只在每 10% 印一行
+    """
+    if IN_GITHUB_ACTIONS:
+        step = max(total // 10, 1)
+        if done % step == 0 or done == total:
+            print(f"進度 {done}/{total}", flush=True)
+    elif done % PROGRESS_EVERY == 0 or done == total:
+        print(f"\r進度 {done}/{total}  {label}", end='', flush=True)
+
+
+async def fetch_one(client, stock_code, chart_range='2y'):
+    """
+    抓單檔月K；查無資料回傳 None
+    429 / 5xx / 連線錯誤會退避重試，仍失敗就拋出例外，由呼叫端計入失敗檔數
+    """
+    url = CHART_URL.format(stock_code)
+    params = {'range': chart_range, 'interval': '1mo', 'events': 'div'}
+    for attempt in range(MAX_RETRIES + 1):
+        resp = None
+        try:
+            resp = await client.get(url, params=params)
+        except httpx.TransportError as e:
+            error = e
+        else:
+            if resp.status_code not in RETRY_STATUS:
+                break
+            error = RuntimeError(f"{stock_code} HTTP {resp.status_code}")
+        if attempt == MAX_RETRIES:
+            raise error
+        delay = 2 ** attempt + random.random()
+        retry_after = resp.headers.get('Retry-After', '') if resp is not None else ''
+        if retry_after.isdigit():
+            delay = max(delay, int(retry_after))
+        await asyncio.sleep(delay)
+
+    if resp.status_code != 200:
+        return None  # 例如 404：代號在 Yahoo 查無資料
     try:
-        ticker = yf.Ticker(stock_code)
-        data = ticker.history(period='2y', interval='1mo')
-        if data.empty or len(data) < 12:
-            return None
-        return data
-    except:
+        return parse_chart(resp.json())
+    except (ValueError, KeyError, IndexError, TypeError):
         return None
 
 
-def calculate_macd(data, fast=12, slow=26, signal=9):
-    ema_fast = data['Close'].ewm(span=fast, adjust=False).mean()
-    ema_slow = data['Close'].ewm(span=slow, adjust=False).mean()
-    macd = ema_fast - ema_slow
-    signal_line = macd.ewm(span=signal, adjust=False).mean()
-    data['MACD'] = macd
-    data['MACD_Signal'] = signal_line
-    data['MACD_Histogram'] = macd - signal_line
-    return data
+def current_month():
+    return pd.Timestamp.now(tz='Asia/Taipei').tz_localize(None).to_period('M')
+
+
+def merge_monthly(cached, latest):
+    """以新抓的 K 棒取代快取中同月份的資料"""
+    overlap = cached.index.to_period('M').isin(latest.index.to_period('M'))
+    return pd.concat([cached[~overlap], latest]).sort_index()
+
+
+def matches_cache(cached, latest):
+    """已完成月份的還原收盤價是否與快取一致；不一致代表期間有除權息，還原基準已變"""
+    common = cached.index.intersection(latest.index)
+    common = common[common.to_period('M') < current_month()]
+    if common.empty:
+        return False
+    a = cached.loc[common, 'Close']
+    b = latest.loc[common, 'Close']
+    return bool(((a - b).abs() <= b.abs() * 1e-6).all())
+
+
+async def fetch_latest(client, stock_code, cached):
+    """
+    沒有快取 → 抓完整 2 年
+    有快取 → 只抓最近幾個月併入快取；還原價對不上時改抓完整 2 年
+    """
+    if cached is None:
+        return await fetch_one(client, stock_code)
+    latest = await fetch_one(client, stock_code, LATEST_RANGE)
+    if latest is None:
+        return None
+    if not matches_cache(cached, latest):
+        return await fetch_one(client, stock_code)
+    return merge_monthly(cached, latest)
+
+
+async def fetch_monthly_all(stock_dict, cached):
+    """並行抓取所有股票月K（當月 K 棒一定重抓），回傳 {代號: DataFrame}"""
+    total = len(stock_dict)
+    done = 0
+
+    async with httpx.AsyncClient(
+        headers={'User-Agent': 'Mozilla/5.0'},
+        timeout=httpx.Timeout(30, pool=None),
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS),
+    ) as client:
+        async def run(stock_code):
+            nonlocal done
+            try:
+                return await fetch_latest(client, stock_code, cached.get(stock_code))
+            finally:
+                done += 1
+                print_progress(done, total, f"{stock_code} {stock_dict[stock_code]}")
+
+        tasks = [run(code) for code in stock_dict]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    if not IN_GITHUB_ACTIONS:
+        print()  # 換行
+    failed = [code for code, data in zip(stock_dict, results) if isinstance(data, Exception)]
+    if failed:
+        more = ' ...' if len(failed) > 10 else ''
+        print(f"⚠️  {len(failed)} 檔重試後仍抓取失敗，本次略過：{', '.join(failed[:10])}{more}")
+    return {code: data for code, data in zip(stock_dict, results)
+            if isinstance(data, pd.DataFrame) and len(data) >= 12}
+
+
+def load_monthly_cache():
+    """讀取已完成月份的月K快取，回傳 {代號: DataFrame}；沒有快取回傳空 dict"""
+    if not os.path.exists(CACHE_FILE):
+        return {}
+    try:
+        df = pd.read_parquet(CACHE_FILE)
+    except Exception as e:
+        print(f"⚠️  讀取快取失敗: {e}")
+        return {}
+    if 'DividendDate' not in df.columns:
+        return {}  # 舊格式快取沒有除息日，整份重抓
+    return {code: g.droplevel(0) for code, g in df.groupby(level=0)}
+
+
+def save_monthly_cache(monthly):
+    """
+    只寫入已完成月份的 K 棒（當月 K 棒還會變動，每次都重抓），
+    並刪除之前月份的快取檔
+    """
+    for path in glob.glob('monthly_cache_*.parquet'):
+        if path != CACHE_FILE:
+            os.remove(path)
+    month = current_month()
+    frames = {}
+    for code, data in monthly.items():
+        completed = data[data.index.to_period('M') < month]
+        if not completed.empty:
+            frames[code] = completed
+    if not frames:
+        return
+    try:
+        pd.concat(frames, names=['代號', 'Date']).to_parquet(CACHE_FILE)
+    except Exception as e:
+        print(f"⚠️  寫入快取失敗: {e}")
+
 
+def build_close_frame(monthly):
+    """把各檔月K收盤價合併成 (月份 × 代號) 的寬表，月份統一為 Period 以便對齊"""
+    closes = {}
+    for code, data in monthly.items():
+        close = data['Close'].set_axis(data.index.to_period('M'))
+        closes[code] = close[~close.index.duplicated(keep='last')]
+    return pd.DataFrame(closes).sort_index()
 
-def check_first_macd_red(data):
-    """判斷是否為第一根紅柱（柱狀體從負轉正）"""
-    if len(data) < 2:
-        return False, {}
-    curr_h = data['MACD_Histogram'].iloc[-1]
-    prev_h = data['MACD_Histogram'].iloc[-2]
-    if not (curr_h > 0 and prev_h <= 0):
-        return False, {}
-    return True, {
-        '當月柱狀體': round(curr_h, 4),
-        '前月柱狀體': round(prev_h, 4),
-        'MACD位階': '多頭' if data['MACD'].iloc[-1] > 0 else '空頭',
+
+def calculate_macd(closes, fast=12, slow=26, signal=9):
+    """
+    一次計算所有欄位的 MACD，回傳 (MACD, 柱狀體)
+    各檔缺 K 棒的月份為 NaN，ignore_na 讓結果等同逐檔只用自己的 K 棒計算
+    """
+    valid = closes.notna()
+    ema_fast = closes.ewm(span=fast, adjust=False, ignore_na=True).mean()
+    ema_slow = closes.ewm(span=slow, adjust=False, ignore_na=True).mean()
+    macd = (ema_fast - ema_slow).where(valid)
+    signal_line = macd.ewm(span=signal, adjust=False, ignore_na=True).mean()
+    return macd, macd - signal_line
+
+
+def last_valid(frame, n=2):
+    """各欄最後 n 個有效值（列 0 = 最新、列 1 = 前一筆），不足補 NaN"""
+    return frame.apply(lambda s: pd.Series(s.dropna().to_numpy()[::-1][:n]).reindex(range(n)))
+
+
+def check_first_macd_red(last_hist):
+    """判斷各檔自己最後兩根柱狀體是否由負轉正（第一根紅柱），回傳布林 Series"""
+    return (last_hist.loc[0] > 0) & (last_hist.loc[1] <= 0)
+
+
+# ────────────────────────────────────────────
+# 股利快取（dividend_cache.json）
+# 格式：{ "2330.TW|202610": {"有發股利": true, "近年股利": 18.0, "殖利率": 1.8}, ... }
+# ────────────────────────────────────────────
+
+def load_dividend_cache():
+    if not os.path.exists(DIVIDEND_CACHE_FILE):
+        return {}
+    try:
+        with open(DIVIDEND_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except:
+        return {}
+
+
+def save_dividend_cache(cache):
+    """只保留當月的資料再寫回"""
+    month = datetime.now().strftime('%Y%m')
+    cache = {k: v for k, v in cache.items() if k.endswith(f'|{month}')}
+    with open(DIVIDEND_CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+
+
+def cache_by_month(func):
+    """以 (代號, 年月) 快取結果；拋出例外的呼叫不會被快取"""
+    @functools.wraps(func)
+    def wrapper(stock_code, *args):
+        key = f"{stock_code}|{datetime.now().strftime('%Y%m')}"
+        if key not in _dividend_cache:
+            _dividend_cache[key] = func(stock_code, *args)
+        return _dividend_cache[key]
+    return wrapper
+
+
+@cache_by_month
+def _fetch_dividend_info(stock_code, data):
+    """股利取自月K資料的 Dividends / DividendDate 欄位，不必再另外打一次 ticker.dividends"""
+    paid = data[data['Dividends'] > 0]
+    if paid.empty:
+        return {'有發股利': False, '近年股利': 0, '殖利率': 0}
+    # 以實際除息日比較；K 棒日期是月初，用它會漏掉去年同月稍晚除息的股利
+    one_year_ago = pd.Timestamp.now(tz='Asia/Taipei').tz_localize(None) - pd.Timedelta(days=365)
+    recent_div = paid.loc[paid['DividendDate'] >= one_year_ago, 'Dividends'].sum()
+    # 現價直接取當月 K 棒收盤（最新一根的還原價即實際價），不必再打一次 API
+    current_price = data['Close'].iloc[-1]
+    if not current_price > 0:
+        # 暫時抓不到價格不能當成「沒股利」快取起來
+        raise ValueError(f"{stock_code} 無法取得現價")
+    dividend_yield = recent_div / current_price * 100
+    if dividend_yield > 20:
+        dividend_yield = 0
+    return {
+        '有發股利': bool(recent_div > 0),
+        '近年股利': round(float(recent_div), 2),
+        '殖利率': round(float(dividend_yield), 2),
     }
 
 
-def get_dividend_info(stock_code):
+def get_dividend_info(stock_code, data):
     try:
-        ticker = yf.Ticker(stock_code)
-        dividends = ticker.dividends
-        if dividends is None or len(dividends) == 0:
-            return {'有發股利': False, '近年股利': 0, '殖利率': 0}
-        dividends = dividends[~dividends.index.duplicated(keep='last')]
-        one_year_ago = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=365)
-        recent_div = dividends[dividends.index >= one_year_ago].sum()
-        hist = ticker.history(period='5d')
-        if hist.empty:
-            return {'有發股利': False, '近年股利': 0, '殖利率': 0}
-        current_price = hist['Close'].iloc[-1]
-        dividend_yield = (recent_div / current_price * 100) if current_price > 0 else 0
-        if dividend_yield > 20:
-            dividend_yield = 0
-        return {
-            '有發股利': recent_div > 0,
-            '近年股利': round(recent_div, 2),
-            '殖利率': round(dividend_yield, 2),
-        }
+        return _fetch_dividend_info(stock_code, data)
     except:
         return {'有發股利': False, '近年股利': 0, '殖利率': 0}
 
@@ -142,23 +405,32 @@ def get_dividend_info(stock_code):
 # 主掃描流程
 # ────────────────────────────────────────────
 
-def scan(stock_dict):
+async def scan_async(stock_dict):
     results = []
-    total = len(stock_dict)
-
-    for idx, (stock_code, stock_name) in enumerate(stock_dict.items(), 1):
-        print(f"\r進度 {idx}/{total}  {stock_code} {stock_name}", end='', flush=True)
-
-        data = fetch_monthly_data(stock_code)
-        if data is None:
-            continue
-
-        data = calculate_macd(data)
-        is_signal, macd_info = check_first_macd_red(data)
-        if not is_signal:
-            continue
-
-        div_info = get_dividend_info(stock_code)
+    cached = load_monthly_cache()
+    if cached:
+        print(f"📦 已完成月份使用快取 {CACHE_FILE}（{len(cached)} 檔），當月 K 棒重新抓取")
+
+    monthly = await fetch_monthly_all(stock_dict, cached)
+    if not monthly:
+        return results
+    # 這次沒抓到的保留原快取，下次還能只抓最近幾個月
+    save_monthly_cache({**cached, **monthly})
+
+    # 所有股票一次算 MACD，只處理出現第一根紅柱的
+    # 不先用「本月收盤 > 上月收盤」預篩：柱狀體轉正只需 MACD 上升，收盤小跌時也可能發生
+    macd, hist = calculate_macd(build_close_frame(monthly))
+    last_hist = last_valid(hist)
+    last_macd = last_valid(macd, 1)
+    signal_mask = check_first_macd_red(last_hist)
+
+    for stock_code in signal_mask.index[signal_mask]:
+        stock_name = stock_dict[stock_code]
+        data = monthly[stock_code]
+        curr_h = last_hist.at[0, stock_code]
+        prev_h = last_hist.at[1, stock_code]
+
+        div_info = get_dividend_info(stock_code, data)
 
         # 篩選條件
         if not div_info['有發股利']:
@@ -174,12 +446,11 @@ def scan(stock_dict):
             '當月最低價': round(data['Low'].iloc[-1], 2),
             '近年股利': div_info['近年股利'],
             '殖利率%': div_info['殖利率'],
-            'MACD位階': macd_info['MACD位階'],
-            '當月柱狀體': macd_info['當月柱狀體'],
-            '前月柱狀體': macd_info['前月柱狀體'],
+            'MACD位階': '多頭' if last_macd.at[0, stock_code] > 0 else '空頭',
+            '當月柱狀體': round(curr_h, 4),
+            '前月柱狀體': round(prev_h, 4),
         })
 
-    print()  # 換行
     return results
 
 
@@ -187,6 +458,14 @@ def scan(stock_dict):
 # 寫入文字檔
 # ────────────────────────────────────────────
 
+_ROW_FORMAT = (
+    "{股票代號:<6} {股票名稱:<10} {市場:<4} "
+    "{現價:>7.2f} {當月最低價:>10.2f} "
+    "{近年股利:>6.2f} {殖利率%:>6.1f}% "
+    "{MACD位階:<6} "
+    "{當月柱狀體:>8.4f} / {前月柱狀體:>8.4f}"
+)
+
 def write_result(results):
     now = datetime.now().strftime('%Y-%m-%d %H:%M')
     lines = []
@@ -206,14 +485,8 @@ def write_result(results):
             f"{'股利':>6} {'殖利率':>7} {'MACD位階':<6} {'柱狀體(本/前月)'}"
         )
         lines.append('-' * 80)
-        for r in sorted(results, key=lambda x: x['殖利率%'], reverse=True):
-            lines.append(
-                f"{r['股票代號']:<6} {r['股票名稱']:<10} {r['市場']:<4} "
-                f"{r['現價']:>7.2f} {r['當月最低價']:>10.2f} "
-                f"{r['近年股利']:>6.2f} {r['殖利率%']:>6.1f}% "
-                f"{r['MACD位階']:<6} "
-                f"{r['當月柱狀體']:>8.4f} / {r['前月柱狀體']:>8.4f}"
-            )
+        rows = sorted(results, key=lambda x: x['殖利率%'], reverse=True)
+        lines.extend(map(_ROW_FORMAT.format_map, rows))
 
     lines.append('=' * 60)
     content = '\n'.join(lines)
@@ -231,7 +504,9 @@ def write_result(results):
 
 if __name__ == '__main__':
     print(f"🚀 開始掃描  {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    _dividend_cache.update(load_dividend_cache())
     stock_dict = get_all_stocks()
-    results = scan(stock_dict)
+    results = asyncio.run(scan_async(stock_dict))
     write_result(results)
+    save_dividend_cache(_dividend_cache)
     print("✅ 完成")